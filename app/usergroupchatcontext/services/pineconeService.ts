@@ -1,61 +1,211 @@
-import { Pinecone } from '@pinecone-database/pinecone';
+import { PineconeClient } from '@pinecone-database/pinecone';
+
+type PineconeIndex = ReturnType<PineconeClient['Index']>;
+
+// Upserts are split into batches that are sent in parallel. A batch is flushed
+// when it reaches UPSERT_BATCH_SIZE vectors or its JSON request body nears
+// Pinecone's 2MB request limit, whichever comes first.
+const UPSERT_BATCH_SIZE = 200;
+export const MAX_UPSERT_PAYLOAD_BYTES = 1.8 * 1024 * 1024;
+const UPSERT_REQUEST_OVERHEAD_BYTES = '{"vectors":[]}'.length;
+const encoder = new TextEncoder();
+// Ingest throughput rises with concurrency up to a few requests in flight and
+// flattens (or starts hitting rate limits) beyond roughly 8
+const DEFAULT_UPSERT_CONCURRENCY = 4;
+// Rate-limited requests back off exponentially (with jitter) between attempts
+const MAX_RATE_LIMIT_RETRIES = 5;
+const INITIAL_RETRY_DELAY_MS = 100;
+const MAX_RETRY_DELAY_MS = 10000;
+
+/**
+ * Whether a failed Pinecone request was rate limited. The pinned 0.1.x client
+ * throws the generated runtime's ResponseError, which carries the fetch Response;
+ * errors re-thrown by the client wrapper only keep the status in their message.
+ */
+function isRateLimitError(error: any): boolean {
+  const status = error?.response?.status ?? error?.status;
+  if (typeof status === 'number') {
+    return status === 429;
+  }
+  // Match the status where the wrapper writes it ("Error calling upsert: 429 ..."),
+  // not any 429 that happens to appear in the message
+  return /Error calling \w+: 429\b|too many requests/i.test(String(error?.message ?? ''));
+}
 
 /**
  * Pinecone service for vector database operations
  * Used for semantic search and memory features
  */
-class PineconeService {
-  private pinecone: Pinecone;
+export class PineconeService {
   private indexName: string = 'agentconsult';
-  private isInitialized: boolean = false;
+  private index: Promise<PineconeIndex> | null = null;
   
-  constructor() {
-    // Initialize with API key from environment variable
-    if (!process.env.PINECONE_API_KEY) {
+  /**
+   * @param index Optional index to use instead of connecting with PINECONE_API_KEY (e.g. a stub in tests)
+   */
+  constructor(index?: PineconeIndex) {
+    if (index) {
+      this.index = Promise.resolve(index);
+    } else if (!process.env.PINECONE_API_KEY) {
       console.error('PINECONE_API_KEY is not set in environment variables');
-      this.pinecone = null as any; // Allow initialization to continue but it will fail later
-    } else {
-      this.pinecone = new Pinecone({
-        apiKey: process.env.PINECONE_API_KEY
-      });
-      this.isInitialized = true;
     }
   }
   
   /**
-   * Get the Pinecone index instance
+   * Get the Pinecone index instance. The client is created and initialized on
+   * first use and the index is shared by every later call.
    */
-  getIndex() {
-    if (!this.isInitialized) {
-      throw new Error('Pinecone client not initialized. PINECONE_API_KEY is required.');
+  getIndex(): Promise<PineconeIndex> {
+    if (!this.index) {
+      if (!process.env.PINECONE_API_KEY) {
+        throw new Error('Pinecone client not initialized. PINECONE_API_KEY is required.');
+      }
+
+      const client = new PineconeClient();
+      this.index = client.init({
+        apiKey: process.env.PINECONE_API_KEY,
+        environment: process.env.PINECONE_ENVIRONMENT!,
+      }).then(
+        () => client.Index(this.indexName),
+        (err) => {
+          // Don't cache a failed setup; the next call will try again
+          this.index = null;
+          throw err;
+        }
+      );
     }
-    return this.pinecone.index(this.indexName);
+    return this.index;
   }
   
   /**
-   * Upsert vectors to the Pinecone index
+   * Upsert vectors to the Pinecone index, sending up to `concurrency` batches at a time.
+   * Resolves to the total `upsertedCount` reported across all batches.
    */
   async upsertVectors(vectors: Array<{
     id: string;
     values: number[];
     metadata?: Record<string, any>;
-  }>) {
-    const index = this.getIndex();
-    return await index.upsert(vectors);
+  }>, concurrency: number = DEFAULT_UPSERT_CONCURRENCY) {
+    const index = await this.getIndex();
+
+    const batches: typeof vectors[] = [];
+    let currentBatch: typeof vectors = [];
+    let currentBytes = UPSERT_REQUEST_OVERHEAD_BYTES;
+    for (const vector of vectors) {
+      // Measure the vector as the client will send it: UTF-8 JSON plus a separating comma.
+      // Serializing is cheap next to the network call, and embedding floats take ~21 bytes each.
+      const vectorBytes = encoder.encode(JSON.stringify(vector)).length + 1;
+
+      if (currentBatch.length > 0 && (
+        currentBatch.length >= UPSERT_BATCH_SIZE ||
+        currentBytes + vectorBytes > MAX_UPSERT_PAYLOAD_BYTES
+      )) {
+        batches.push(currentBatch);
+        currentBatch = [];
+        currentBytes = UPSERT_REQUEST_OVERHEAD_BYTES;
+      }
+
+      currentBatch.push(vector);
+      currentBytes += vectorBytes;
+    }
+    if (currentBatch.length > 0) {
+      batches.push(currentBatch);
+    }
+
+    // Keep a bounded number of upsert requests in flight at once. After the first
+    // failure no worker takes a new batch, so the batches after it are never sent
+    // whatever the concurrency.
+    let nextBatch = 0;
+    let upsertedCount = 0;
+    let failed = false;
+    let firstError: unknown;
+    const worker = async () => {
+      while (!failed && nextBatch < batches.length) {
+        const batch = batches[nextBatch++];
+        try {
+          const response = await this.withRateLimitRetry(
+            () => index.upsert({ upsertRequest: { vectors: batch } })
+          );
+          upsertedCount += response?.upsertedCount ?? 0;
+        } catch (error) {
+          if (!failed) {
+            failed = true;
+            firstError = error;
+          }
+          return;
+        }
+      }
+    };
+
+    // Let batches already in flight finish, then surface the first failure
+    const requestedWorkers = Number.isFinite(concurrency)
+      ? Math.floor(concurrency)
+      : DEFAULT_UPSERT_CONCURRENCY;
+    const workerCount = Math.max(1, Math.min(requestedWorkers, batches.length));
+    await Promise.all(Array.from({ length: workerCount }, worker));
+    if (failed) {
+      throw firstError;
+    }
+    return { upsertedCount };
+  }
+  
+  /**
+   * Run a Pinecone request, waiting and retrying when it is rate limited (HTTP 429)
+   */
+  private async withRateLimitRetry<T>(operation: () => Promise<T>): Promise<T> {
+    for (let attempt = 0; ; attempt++) {
+      try {
+        return await operation();
+      } catch (error: any) {
+        if (!isRateLimitError(error) || attempt >= MAX_RATE_LIMIT_RETRIES) {
+          throw error;
+        }
+
+        // Honour Retry-After when the server sends it, but never wait longer than the backoff cap
+        const retryAfter = Number(error?.response?.headers?.get?.('retry-after'));
+        const backoff = Math.min(MAX_RETRY_DELAY_MS, INITIAL_RETRY_DELAY_MS * 2 ** attempt);
+        const delay = retryAfter > 0
+          ? Math.min(MAX_RETRY_DELAY_MS, retryAfter * 1000)
+          : Math.round(backoff / 2 + Math.random() * backoff / 2);
+        console.warn(`Pinecone rate limit hit, retrying in ${delay}ms...`);
+        await new Promise(resolve => setTimeout(resolve, delay));
+      }
+    }
   }
   
   /**
-   * Query vectors from the Pinecone index
+   * Query vectors from the Pinecone index.
+   * Array filter values match any of the listed values, e.g. `{ file_type: ['component', 'hook'] }`
    */
   async queryVectors(queryVector: number[], topK: number = 5, filter?: Record<string, any>) {
-    const index = this.getIndex();
+    const index = await this.getIndex();
     return await index.query({
-      vector: queryVector,
-      topK,
-      includeMetadata: true,
-      ...(filter && { filter })
+      queryRequest: {
+        vector: queryVector,
+        topK,
+        includeMetadata: true,
+        ...(filter && { filter: this.buildFilter(filter) })
+      }
     });
   }
+  
+  /**
+   * Turn array values on plain field names into `$in` clauses so several values
+   * are matched in one query. Operator keys such as `$and`/`$or` pass through as-is.
+   */
+  private buildFilter(filter: Record<string, any>) {
+    const metadataFilter: Record<string, any> = {};
+    for (const [field, value] of Object.entries(filter)) {
+      if (field.startsWith('$') || !Array.isArray(value)) {
+        metadataFilter[field] = value;
+      } else if (value.length === 0) {
+        throw new Error(`Filter on "${field}" needs at least one value`);
+      } else {
+        metadataFilter[field] = value.length === 1 ? value[0] : { $in: value };
+      }
+    }
+    return metadataFilter;
+  }
 }
 
 // Export as singleton
@@ -13,10 +13,16 @@ export class MemoryManager {
   private static instance: MemoryManager;
   private history: Redis;
   private vectorDBClient: PineconeClient;
+  private embeddings: OpenAIEmbeddings;
+  private vectorStore?: Promise<PineconeStore>;
 
   public constructor() {
     this.history = Redis.fromEnv();
     this.vectorDBClient = new PineconeClient();
+    // One embeddings client per process so its connections are reused between searches
+    this.embeddings = new OpenAIEmbeddings({
+      openAIApiKey: process.env.OPENAI_API_KEY,
+    });
   }
 
   public async init() {
@@ -32,16 +38,7 @@ export class MemoryManager {
     recentChatHistory: string,
     companionFileName: string
   ) {
-    const pineconeClient = <PineconeClient>this.vectorDBClient;
-
-    const pineconeIndex = pineconeClient.Index(
-      process.env.PINECONE_INDEX! || ""
-    );
-
-    const vectorStore = await PineconeStore.fromExistingIndex(
-      new OpenAIEmbeddings({ openAIApiKey: process.env.OPENAI_API_KEY }),
-      { pineconeIndex }
-    ); 
+    const vectorStore = await this.getVectorStore();
 
     const similarDocs = await vectorStore
       .similaritySearch(recentChatHistory, 3, { fileName: companionFileName })
@@ -51,6 +48,27 @@ export class MemoryManager {
     return similarDocs;
   }
 
+  private getVectorStore(): Promise<PineconeStore> {
+    // Build the index handle and store once and share them across searches
+    if (!this.vectorStore) {
+      const pineconeClient = <PineconeClient>this.vectorDBClient;
+
+      const pineconeIndex = pineconeClient.Index(
+        process.env.PINECONE_INDEX! || ""
+      );
+
+      this.vectorStore = PineconeStore.fromExistingIndex(
+        this.embeddings,
+        { pineconeIndex }
+      ).catch((err) => {
+        // Don't cache a failed setup; the next search will try again
+        this.vectorStore = undefined;
+        throw err;
+      });
+    }
+    return this.vectorStore;
+  }
+
   public static async getInstance(): Promise<MemoryManager> {
     if (!MemoryManager.instance) {
       MemoryManager.instance = new MemoryManager();
@@ -105,12 +123,16 @@ export class MemoryManager {
       return;
     }
 
-    const content = seedContent.split(delimiter);
-    let counter = 0;
-    for (const line of content) {
-      await this.history.zadd(key, { score: counter, member: line });
-      counter += 1;
+    // Send every non-blank seed line in a single ZADD rather than one round-trip per line
+    const members = seedContent
+      .split(delimiter)
+      .filter((line) => line.trim().length > 0)
+      .map((line, index) => ({ score: index, member: line }));
+    if (members.length === 0) {
+      return;
     }
+
+    await this.history.zadd(key, members[0], ...members.slice(1));
   }
 }
 
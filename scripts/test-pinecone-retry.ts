@@ -0,0 +1,134 @@
+import { MAX_UPSERT_PAYLOAD_BYTES, PineconeService } from '../app/usergroupchatcontext/services/pineconeService';
+
+/**
+ * Check PineconeService.upsertVectors retry and failure handling against a stubbed index
+ *
+ * Usage:
+ * - Run: npm run pinecone:test-retry
+ */
+
+type Vector = { id: string; values: number[]; metadata?: Record<string, any> };
+
+// Shape of the error thrown by the pinned 0.1.x client's generated runtime
+function responseError(status: number) {
+  return Object.assign(new Error('Response returned an error code'), {
+    name: 'ResponseError',
+    response: new Response(null, { status, headers: { 'retry-after': '0' } }),
+  });
+}
+
+// Build a service whose index fails the first `failures.length` upserts with the given errors
+function stubbedService(failures: Error[]) {
+  const upserted: Vector[][] = [];
+  let calls = 0;
+  const index = {
+    upsert: async ({ upsertRequest }: { upsertRequest: { vectors: Vector[] } }) => {
+      calls++;
+      const failure = failures.shift();
+      if (failure) {
+        throw failure;
+      }
+      upserted.push(upsertRequest.vectors);
+      return { upsertedCount: upsertRequest.vectors.length };
+    },
+  };
+  const service = new PineconeService(index as any);
+  return { service, upserted, calls: () => calls };
+}
+
+const vectors: Vector[] = [{ id: 'chunk-1', values: [0.1, 0.2, 0.3] }];
+
+async function expectRetried(label: string, error: Error) {
+  const { service, upserted, calls } = stubbedService([error]);
+  await service.upsertVectors(vectors);
+  if (calls() !== 2 || upserted.length !== 1) {
+    throw new Error(`${label}: expected one retry, saw ${calls()} calls`);
+  }
+  console.log(`✅ ${label} is retried`);
+}
+
+async function expectNotRetried(label: string, error: Error) {
+  const { service, calls } = stubbedService([error]);
+  const rejected = await service.upsertVectors(vectors).then(() => false, () => true);
+  if (!rejected || calls() !== 1) {
+    throw new Error(`${label}: expected a single failed call, saw ${calls()} calls`);
+  }
+  console.log(`✅ ${label} is not retried`);
+}
+
+async function expectStopsAfterFailure() {
+  // 600 vectors make three 200-vector batches; the first one fails
+  const manyVectors = Array.from({ length: 600 }, (_, i) => ({ id: `chunk-${i + 1}`, values: [0.1] }));
+  const { service, upserted, calls } = stubbedService([responseError(400)]);
+  const rejected = await service.upsertVectors(manyVectors, 2).then(() => false, () => true);
+  // The second worker's in-flight batch completes, but nobody takes the third
+  if (!rejected || calls() !== 2 || upserted.length !== 1) {
+    throw new Error(`Failed batch: expected 2 calls and 1 write, saw ${calls()} and ${upserted.length}`);
+  }
+  console.log('✅ No new batches are sent after a failure');
+}
+
+async function expectInvalidConcurrencyUpserts() {
+  const { service, upserted } = stubbedService([]);
+  await service.upsertVectors(vectors, NaN);
+  if (upserted.length !== 1) {
+    throw new Error('NaN concurrency: expected the batch to be upserted');
+  }
+  console.log('✅ NaN concurrency still upserts');
+}
+
+async function expectUpsertedCountSummed() {
+  const manyVectors = Array.from({ length: 450 }, (_, i) => ({ id: `chunk-${i + 1}`, values: [0.1] }));
+  const { service } = stubbedService([]);
+  const { upsertedCount } = await service.upsertVectors(manyVectors, 3);
+  if (upsertedCount !== 450) {
+    throw new Error(`Upserted count: expected 450, got ${upsertedCount}`);
+  }
+  console.log('✅ upsertedCount is summed across batches');
+}
+
+async function expectBatchesUnderPayloadLimit() {
+  // Realistic embeddings: 1536 random floats plus 2KB of chunk text each
+  const text = 'x'.repeat(2048);
+  const embeddings = Array.from({ length: 200 }, (_, i) => ({
+    id: `chunk-${i + 1}`,
+    values: Array.from({ length: 1536 }, () => Math.random() * 2 - 1),
+    metadata: { text },
+  }));
+  const { service, upserted } = stubbedService([]);
+  await service.upsertVectors(embeddings);
+
+  const encoder = new TextEncoder();
+  for (const batch of upserted) {
+    const bytes = encoder.encode(JSON.stringify({ vectors: batch })).length;
+    if (bytes > MAX_UPSERT_PAYLOAD_BYTES) {
+      throw new Error(`Payload limit: a ${batch.length}-vector batch is ${bytes} bytes`);
+    }
+  }
+  if (upserted.length < 2) {
+    throw new Error('Payload limit: expected 1536-dim vectors to be split by size');
+  }
+  console.log(`✅ 1536-dim batches stay under the payload limit (${upserted.length} batches)`);
+}
+
+async function testPineconeRetry() {
+  await expectRetried('ResponseError with HTTP 429', responseError(429));
+  await expectRetried(
+    'Wrapped "429 Too Many Requests" error',
+    new Error('PineconeClient: Error calling upsert: 429 Too Many Requests')
+  );
+  await expectNotRetried('ResponseError with HTTP 400', responseError(400));
+  await expectNotRetried(
+    'Wrapped 400 mentioning 429',
+    new Error('PineconeClient: Error calling upsert: 400: vector chunk-429 has wrong dimension')
+  );
+  await expectStopsAfterFailure();
+  await expectInvalidConcurrencyUpserts();
+  await expectUpsertedCountSummed();
+  await expectBatchesUnderPayloadLimit();
+}
+
+testPineconeRetry().catch(error => {
+  console.error('❌', error.message);
+  process.exit(1);
+});